@@ -3,9 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, date, time, timedelta, timezone
 import re, math, calendar as cal_mod, os
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
 from urllib.parse import urlencode
 from urllib.request import urlopen
 import xml.etree.ElementTree as ET
+import numpy as np
 import streamlit as st
 from zoneinfo import ZoneInfo
 try:
@@ -14,7 +18,7 @@ try:
 except Exception:
     HAS_LUNAR = False
 
-from korea_tz_history import wall_to_true_solar_time, describe_timezone_for_date, get_wall_clock_utc_offset
+from korea_tz_history import wall_to_true_solar_time, wall_to_true_solar_time_batch, wall_to_true_solar_offset_minutes, describe_timezone_for_date, get_wall_clock_utc_offset
 
 def get_kasi_key():
     try:
@@ -44,6 +48,10 @@ def to_solar_time(dt_local, longitude=DEFAULT_LONGITUDE):
         result = result.replace(tzinfo=LOCAL_TZ)
     return result
 
+def to_solar_time_batch(dts_local, longitude=DEFAULT_LONGITUDE):
+    """to_solar_time 일괄판 — 균시차를 한 번에 계산"""
+    return [r if r.tzinfo is not None else r.replace(tzinfo=LOCAL_TZ) for r in wall_to_true_solar_time_batch(dts_local, longitude, apply_eot=True)]
+
 def tz_label_for_date(d):
     """날짜에 해당하는 표준시 라벨 반환 (예: '東京 UTC+09:00' 또는 '서울+DST UTC+09:30')"""
     info = describe_timezone_for_date(d if isinstance(d, date) and not isinstance(d, datetime) else d.date() if hasattr(d, 'date') else d)
@@ -101,13 +109,11 @@ def check_boundary_warning(dt_solar, jie24_solar, hour_branch_idx):
             warnings.append(f"⚠️ 절입 경계: {name} 시각과 {diff_min:.0f}분 차이 — 월주가 달라질 수 있어 정밀검증 권장")
             break
     # 시주 경계 ±30분 체크
-    mins = dt_solar.hour * 60 + dt_solar.minute
-    si_boundaries = [23*60, 1*60, 3*60, 5*60, 7*60, 9*60, 11*60, 13*60, 15*60, 17*60, 19*60, 21*60]
-    for sb in si_boundaries:
-        diff = abs((mins - sb + 720) % 1440 - 720)
-        if diff <= 30:
-            warnings.append(f"⚠️ 시주 경계: 시주 전환 시각과 {diff}분 차이 — 시주가 달라질 수 있어 정밀검증 권장")
-            break
+    # 시주 경계는 23:00 + k×120분 → 가장 가까운 경계까지의 거리를 바로 계산
+    rem = (dt_solar.hour * 60 + dt_solar.minute - 23*60) % 120
+    diff = min(rem, 120 - rem)
+    if diff <= 30:
+        warnings.append(f"⚠️ 시주 경계: 시주 전환 시각과 {diff}분 차이 — 시주가 달라질 수 있어 정밀검증 권장")
     return warnings
 
 def render_tst_compare_html(dt_wall, dt_tst, fp_wall, fp_tst):
@@ -134,6 +140,9 @@ HANJA_JI = ['子','丑','寅','卯','辰','巳','午','未','申','酉','戌','
 MONTH_JI = ['인','묘','진','사','오','미','신','유','술','해','자','축']
 JIE_TO_MONTH_JI = {'입춘':'인','경칩':'묘','청명':'진','입하':'사','망종':'오','소서':'미','입추':'신','백로':'유','한로':'술','입동':'해','대설':'자','소한':'축','(전년)대설':'자'}
 MONTH_TO_2TERMS = {'인':('입춘','우수'),'묘':('경칩','춘분'),'진':('청명','곡우'),'사':('입하','소만'),'오':('망종','하지'),'미':('소서','대서'),'신':('입추','처서'),'유':('백로','추분'),'술':('한로','상강'),'해':('입동','소설'),'자':('대설','동지'),'축':('소한','대한')}
+# MONTH_JI 인덱스(m_bidx) → 절(節)/중기(中氣) 이름
+FIRST_TERM_BY_MONTH_IDX = [MONTH_TO_2TERMS[b][0] for b in MONTH_JI]
+MID_TERM_BY_MONTH_IDX = [MONTH_TO_2TERMS[b][1] for b in MONTH_JI]
 GAN_BG = {'갑':'#2ecc71','을':'#2ecc71','병':'#e74c3c','정':'#e74c3c','무':'#f1c40f','기':'#f1c40f','경':'#ffffff','신':'#ffffff','임':'#000000','계':'#000000'}
 BR_BG = {'해':'#000000','자':'#000000','인':'#2ecc71','묘':'#2ecc71','사':'#e74c3c','오':'#e74c3c','신':'#ffffff','유':'#ffffff','진':'#f1c40f','술':'#f1c40f','축':'#f1c40f','미':'#f1c40f'}
 def gan_fg(gan): bg=GAN_BG.get(gan,'#fff'); return '#000000' if bg in ('#ffffff','#f1c40f') else '#ffffff'
@@ -162,8 +171,8 @@ def ten_god_for_stem(day_stem, other_stem):
     if o_e==ELEM_PROD_ME[d_e]: return '편인' if o_p==d_p else '정인'
     return '미정'
 def ten_god_for_branch(day_stem, branch): return ten_god_for_stem(day_stem, BRANCH_MAIN[branch])
-def six_for_stem(ds,s): return ten_god_for_stem(ds,s)
-def six_for_branch(ds,b): return ten_god_for_branch(ds,b)
+def six_for_stem(ds,s): return TEN_GOD_BY_IDX[CHEONGAN_IDX[ds]][CHEONGAN_IDX[s]]
+def six_for_branch(ds,b): return TEN_GOD_BY_BRANCH[CHEONGAN_IDX[ds]][JIJI_IDX[b]]
 def all_hidden_stems(branches):
     s=set()
     for b in branches: s.update(BRANCH_HIDDEN.get(b,[]))
@@ -174,14 +183,41 @@ JIE_DEGREES = {'입춘':315,'경칩':345,'청명':15,'입하':45,'망종':75,'
 JIE_ORDER = ['입춘','경칩','청명','입하','망종','소서','입추','백로','한로','입동','대설','소한']
 JIE24_DEGREES = {'입춘':315,'우수':330,'경칩':345,'춘분':0,'청명':15,'곡우':30,'입하':45,'소만':60,'망종':75,'하지':90,'소서':105,'대서':120,'입추':135,'처서':150,'백로':165,'추분':180,'한로':195,'상강':210,'입동':225,'소설':240,'대설':255,'동지':270,'소한':285,'대한':300}
 JIE24_ORDER = ['입춘','우수','경칩','춘분','청명','곡우','입하','소만','망종','하지','소서','대서','입추','처서','백로','추분','한로','상강','입동','소설','대설','동지','소한','대한']
+CHEONGAN_IDX = {n:i for i,n in enumerate(CHEONGAN)}
+JIJI_IDX = {n:i for i,n in enumerate(JIJI)}
+MONTH_JI_IDX = {n:i for i,n in enumerate(MONTH_JI)}
+JIE_ORDER_IDX = {n:i for i,n in enumerate(JIE_ORDER)}
+JIE24_ORDER_IDX = {n:i for i,n in enumerate(JIE24_ORDER)}
+# 천간 집합 ↔ 10비트 마스크 (bit i = CHEONGAN[i])
+STEM_BIT = {n:1<<i for i,n in enumerate(CHEONGAN)}
+def stem_mask(stems):
+    m=0
+    for s in stems: m|=STEM_BIT[s]
+    return m
+# 일간 인덱스 × 천간/지지 인덱스 → 십신 인덱스 (값은 SIX_LABELS 인덱스, _day_kernel 용)
+SIX_LABELS = ('비견','겁재','식신','상관','편재','정재','편관','정관','편인','정인')
+SIX_STEM_IDX = np.array([[SIX_LABELS.index(ten_god_for_stem(d,o)) for o in CHEONGAN] for d in CHEONGAN], dtype=np.int8)
+SIX_BRANCH_IDX = np.array([[SIX_LABELS.index(ten_god_for_branch(d,b)) for b in JIJI] for d in CHEONGAN], dtype=np.int8)
+# 같은 표의 문자열판 — 파이썬 스칼라 조회는 리스트가 ndarray 원소 접근보다 빠르다 (six_for_stem / six_for_branch 용)
+TEN_GOD_BY_IDX = [[SIX_LABELS[i] for i in row] for row in SIX_STEM_IDX.tolist()]
+TEN_GOD_BY_BRANCH = [[SIX_LABELS[i] for i in row] for row in SIX_BRANCH_IDX.tolist()]
 SIDU_START = {('갑','기'):'갑',('을','경'):'병',('병','신'):'무',('정','임'):'경',('무','계'):'임'}
+SIDU_START_BY_DAY_GAN_IDX = [0]*10  # 일간 인덱스 → 자시 시작 천간 인덱스
+for pair,start in SIDU_START.items():
+    for g in pair: SIDU_START_BY_DAY_GAN_IDX[CHEONGAN_IDX[g]] = CHEONGAN_IDX[start]
 def month_start_gan_idx(year_gan_idx): return ((year_gan_idx % 5) * 2 + 2) % 10
 K_ANCHOR = 49
 
+def _day_kernel(ilgan_idx, day60):
+    """일별 60갑자 인덱스 배열 → (천간 idx, 지지 idx, 천간 십신 idx, 지지 십신 idx) 배열"""
+    g=day60%10; j=day60%12
+    return g,j,SIX_STEM_IDX[ilgan_idx,g],SIX_BRANCH_IDX[ilgan_idx,j]
+
 def jdn_0h_utc(y,m,d):
     if m<=2: y-=1; m+=12
     A=y//100; B=2-A+A//4
     return int(365.25*(y+4716))+int(30.6001*(m+1))+d+B-1524
+JDN_MINUS_ORDINAL = 1721425  # jdn_0h_utc(d) - d.toordinal() (그레고리력 전 구간 일정)
 
 def jd_from_utc(dt_utc):
     y=dt_utc.year; m=dt_utc.month
@@ -193,6 +229,7 @@ def jd_from_utc(dt_utc):
 def norm360(x): return x%360.0
 def wrap180(x): return (x+180.0)%360.0-180.0
 
+@lru_cache(maxsize=256)
 def delta_t_seconds(year):
     y = year
     if 2005 <= y <= 2050:
@@ -200,9 +237,8 @@ def delta_t_seconds(year):
         return 62.92 + 0.32217*t + 0.005589*t*t
     elif 1986 <= y < 2005:
         t = y - 2000
-        return 63.86 + 0.3345*t - 0.060374*t*t \
-               + 0.0017275*t**3 + 0.000651814*t**4 \
-               + 0.00002373599*t**5
+        return ((((0.00002373599*t + 0.000651814)*t + 0.0017275)*t
+                 - 0.060374)*t + 0.3345)*t + 63.86
     else:
         t = (y - 2000)/100
         return 62.92 + 32.217*t + 55.89*t*t
@@ -218,17 +254,24 @@ try:
 except ImportError:
     _HAS_EPHEM = False
 
-def solar_longitude_deg(dt_utc):
-    """태양 황경(도) 계산 — ephem(VSOP87 완전판) 우선, 없으면 간이공식"""
+def solar_longitude_deg(dt_utc): return solar_longitude_deg_from_jd(jd_from_utc(dt_utc))
+
+def solar_longitude_deg_from_jd(jd):
+    """태양 황경(도) — 율리우스일(UT, float) 입력. ephem(VSOP87 완전판) 우선, 없으면 간이 Meeus 공식"""
     if _HAS_EPHEM:
-        d = _ephem.Date(dt_utc)
-        s = _ephem.Sun(d)
-        eq = _ephem.Equatorial(s.ra, s.dec, epoch=d)
-        ec = _ephem.Ecliptic(eq)
-        return math.degrees(float(ec.lon)) % 360
-    # 폴백: 간이 Meeus 공식
-    dt_tt = dt_utc + timedelta(seconds=delta_t_seconds(dt_utc.year))
-    JD = jd_from_utc(dt_tt)
+        return _ephem_solar_longitude(_ephem.Date(jd - 2415020.0))  # ephem: Dublin JD
+    # 폴백: 간이 Meeus 공식 (ΔT 는 근사 연도로)
+    year = int(2000 + (jd - 2451544.5) / 365.2425)
+    return _meeus_solar_longitude(jd + delta_t_seconds(year) / 86400.0)
+
+def _ephem_solar_longitude(d):
+    s = _ephem.Sun(d)
+    eq = _ephem.Equatorial(s.ra, s.dec, epoch=d)
+    ec = _ephem.Ecliptic(eq)
+    return math.degrees(float(ec.lon)) % 360
+
+def _meeus_solar_longitude(JD):
+    """간이 Meeus 공식 — JD는 TT 기준 율리우스일"""
     T = (JD - 2451545.0) / 36525.0
     L0 = norm360(280.46646 + 36000.76983*T + 0.0003032*T*T)
     M  = norm360(357.52911 + 35999.05029*T - 0.0001537*T*T)
@@ -241,30 +284,51 @@ def solar_longitude_deg(dt_utc):
     lam = theta - 0.00569 - 0.00478 * math.sin(math.radians(Omega))
     return norm360(lam)
 
+def solar_longitude_deg_array(jd_array, delta_t_sec=0.0):
+    """간이 Meeus 공식의 NumPy 벡터판 — UT 율리우스일 배열 → 태양 황경(도) 배열"""
+    JD = np.asarray(jd_array, dtype=float) + delta_t_sec / 86400.0
+    T = (JD - 2451545.0) / 36525.0
+    L0 = np.mod(280.46646 + 36000.76983*T + 0.0003032*T*T, 360.0)
+    M  = np.mod(357.52911 + 35999.05029*T - 0.0001537*T*T, 360.0)
+    Mr = np.radians(M)
+    C = ((1.914602 - 0.004817*T - 0.000014*T*T) * np.sin(Mr)
+         + (0.019993 - 0.000101*T) * np.sin(2*Mr)
+         + 0.000289 * np.sin(3*Mr))
+    Omega = 125.04 - 1934.136*T
+    lam = L0 + C - 0.00569 - 0.00478 * np.sin(np.radians(Omega))
+    return np.mod(lam, 360.0)
+
+SUN_DEG_PER_DAY = 0.9856474  # 태양 평균 황경 속도
+J2000_UTC = datetime(2000,1,1,12,0,tzinfo=timezone.utc)  # JD 2451545.0
+
+def utc_from_jd(jd):
+    """율리우스일(UT) → UTC datetime"""
+    return J2000_UTC+timedelta(days=float(jd)-2451545.0)
+
 def find_longitude_time_utc(year, target_deg, approx_dt_local):
     """절기 시각을 UTC로 계산하여 반환 (천문 이벤트 시각)"""
-    a=(approx_dt_local-timedelta(days=7)).astimezone(timezone.utc)
-    b=(approx_dt_local+timedelta(days=7)).astimezone(timezone.utc)
-    def f(dt_utc): return wrap180(solar_longitude_deg(dt_utc)-target_deg)
-    scan,step=a,timedelta(hours=6); fa=f(scan); found=False
-    while scan<b:
+    # datetime 대신 율리우스일(float) 위에서 탐색하고 마지막에 한 번만 변환
+    jd_approx=jd_from_utc(approx_dt_local.astimezone(timezone.utc))
+    def f(jd): return wrap180(solar_longitude_deg_from_jd(jd)-target_deg)
+    scan,end,step=jd_approx-7,jd_approx+7,0.25; fa=f(scan); jd=jd_approx
+    while scan<end:
         scan2=scan+step; fb=f(scan2)
-        if fa==0 or fb==0 or (fa<0 and fb>0) or (fa>0 and fb<0): a,b=scan,scan2; found=True; break
+        if fa==0 or fb==0 or (fa<0 and fb>0) or (fa>0 and fb<0): jd=(scan+scan2)/2; break
         scan,fa=scan2,fb
-    if not found:
-        a=(approx_dt_local-timedelta(days=1)).astimezone(timezone.utc)
-        b=(approx_dt_local+timedelta(days=1)).astimezone(timezone.utc)
-    for _ in range(100):
-        mid=a+(b-a)/2; fm=f(mid); fa=f(a)
-        if fm==0: a=b=mid; break
-        if (fa<=0 and fm>=0) or (fa>=0 and fm<=0): b=mid
-        else: a=mid
-    return (a+(b-a)/2).replace(microsecond=0)  # UTC datetime 반환
+    # 뉴턴 보정 — 황경 속도(≈0.9856°/일)가 거의 일정하므로 몇 번이면 1초 이내로 수렴
+    for _ in range(8):
+        err=f(jd)
+        if abs(err)<1e-5: break  # 1e-5° ≈ 1초
+        jd-=err/SUN_DEG_PER_DAY
+    return utc_from_jd(jd).replace(microsecond=0)  # UTC datetime 반환
 
 def find_longitude_time_local(year, target_deg, approx_dt_local):
     """절기 시각을 벽시계(당시 법정시)로 변환하여 반환"""
     dt_utc = find_longitude_time_utc(year, target_deg, approx_dt_local)
-    # UTC → 역사적 한국 법정시(벽시계)로 변환
+    return jie_utc_to_local(dt_utc)
+
+def jie_utc_to_local(dt_utc):
+    """UTC 절기 시각 → 역사적 한국 법정시(벽시계)"""
     target_date = dt_utc.date()
     offset_min = get_wall_clock_utc_offset(target_date)
     mid_local = dt_utc + timedelta(minutes=offset_min)
@@ -283,46 +347,73 @@ def approx_guess_local_24(year):
     for name,(m,d) in rough.items(): out[name]=datetime(year,m,d,9,0,tzinfo=LOCAL_TZ)
     return out
 
-def compute_jie_times_calc(year):
-    """12절기 시각 계산 — 벽시계(당시 법정시) 반환"""
+@st.cache_data(show_spinner=False, max_entries=64)
+def _jie12_table(year):
+    """12절기 벽시계 시각 — Streamlit 리런 간 캐시 (compute_jie_times_calc 내부용)"""
     guesses=approx_guess_local(year); terms={}
     for name in JIE_ORDER: terms[name]=find_longitude_time_local(year,JIE_DEGREES[name],guesses[name])
     terms['(전년)대설']=find_longitude_time_local(year-1,JIE_DEGREES['대설'],guesses['(전년)대설'])
     return terms
 
-def compute_jie24_times_calc(year):
-    """24절기 시각 계산 — 벽시계(당시 법정시) 반환"""
+@lru_cache(maxsize=64)
+def compute_jie_times_calc(year):
+    """12절기 시각 계산 — 벽시계(당시 법정시) 반환 (연도별 캐시, 읽기 전용)"""
+    return MappingProxyType(_jie12_table(year))
+
+def compute_jie24_times_meeus_batch(year):
+    """24절기 UTC 시각 — 간이공식을 1년치 1시간 격자에 한 번에 적용 후 뉴턴 보정 (ephem 없을 때)"""
+    guesses=approx_guess_local_24(year)
+    jd=np.arange(jdn_0h_utc(year,1,1)-10.5, jdn_0h_utc(year+1,1,1)+9.5, 1/24)
+    dts=delta_t_seconds(year)
+    lam=np.unwrap(solar_longitude_deg_array(jd,dts), period=360.0)  # 단조 증가
+    targets=np.array([JIE24_DEGREES[n] for n in JIE24_ORDER], dtype=float)
+    jd_guess=np.array([jd_from_utc(guesses[n].astimezone(timezone.utc)) for n in JIE24_ORDER])
+    lam_guess=np.interp(jd_guess, jd, lam)
+    targets_u=targets+360.0*np.round((lam_guess-targets)/360.0)  # 추정일에 가장 가까운 교차
+    jd_root=np.interp(targets_u, lam, jd)
+    for _ in range(4):
+        jd_root-=wrap180(solar_longitude_deg_array(jd_root,dts)-targets)/SUN_DEG_PER_DAY
+    return {n:utc_from_jd(j).replace(microsecond=0) for n,j in zip(JIE24_ORDER,jd_root)}
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _jie24_table(year):
+    """24절기 벽시계 시각 — Streamlit 리런 간 캐시 (compute_jie24_times_calc 내부용)"""
+    if not _HAS_EPHEM:
+        return {n:jie_utc_to_local(t) for n,t in compute_jie24_times_meeus_batch(year).items()}
     guesses=approx_guess_local_24(year); out={}
     for name in JIE24_ORDER:
         deg=JIE24_DEGREES[name]; approx=guesses[name]; calc_year=approx.year
         out[name]=find_longitude_time_local(calc_year,deg,approx)
     return out
 
+@lru_cache(maxsize=64)
+def compute_jie24_times_calc(year):
+    """24절기 시각 계산 — 벽시계(당시 법정시) 반환 (연도별 캐시, 읽기 전용)"""
+    return MappingProxyType(_jie24_table(year))
+
 def pillar_day_by_2300(dt_solar):
-    return (dt_solar+timedelta(days=1)).date() if (dt_solar.hour,dt_solar.minute)>=(23,0) else dt_solar.date()
+    return date.fromordinal(dt_solar.toordinal()+1) if dt_solar.hour>=23 else dt_solar.date()
 
 def day_ganji_solar(dt_solar, k_anchor=K_ANCHOR):
     d=pillar_day_by_2300(dt_solar); idx60=(jdn_0h_utc(d.year,d.month,d.day)+k_anchor)%60
     cidx,jidx=idx60%10,idx60%12; return CHEONGAN[cidx]+JIJI[jidx],cidx,jidx
 
 def hour_branch_idx_2300(dt_solar):
-    mins = dt_solar.hour * 60 + dt_solar.minute
-    off = (mins - (23 * 60)) % 1440
-    return off // 120
+    return ((dt_solar.hour*60+dt_solar.minute-23*60)%1440)//120
 def sidu_zi_start_gan(day_gan):
-    for pair,start in SIDU_START.items():
-        if day_gan in pair: return start
-    raise ValueError('invalid day gan')
+    if day_gan not in CHEONGAN_IDX: raise ValueError('invalid day gan')
+    return CHEONGAN[SIDU_START_BY_DAY_GAN_IDX[CHEONGAN_IDX[day_gan]]]
 
-def four_pillars_from_solar(dt_solar, k_anchor=K_ANCHOR):
-    jie12_wall = compute_jie_times_calc(dt_solar.year)
+def four_pillars_from_solar(dt_solar, k_anchor=K_ANCHOR, jie12_wall=None, apply_solar=None, longitude=None):
+    """사주 4주 계산 — jie12_wall: dt_solar.year의 12절기 벽시계 표 (반복 호출 시 미리 넘길 수 있음)
+    apply_solar/longitude 미지정 시 session_state 값을 사용"""
+    if jie12_wall is None: jie12_wall = compute_jie_times_calc(dt_solar.year)
+    if apply_solar is None: apply_solar = st.session_state.get('apply_solar', True)
 
     # 사주 비교용: 절기도 진태양시로 변환
-    if st.session_state.get('apply_solar', True):
-        lon = st.session_state.get('longitude', DEFAULT_LONGITUDE)
-        jie_solar = {}
-        for k in jie12_wall:
-            jie_solar[k] = to_solar_time(jie12_wall[k], lon)
+    if apply_solar:
+        lon = st.session_state.get('longitude', DEFAULT_LONGITUDE) if longitude is None else longitude
+        jie_solar = dict(zip(jie12_wall, to_solar_time_batch(list(jie12_wall.values()), lon)))
     else:
         jie_solar = dict(jie12_wall)
 
@@ -335,23 +426,20 @@ def four_pillars_from_solar(dt_solar, k_anchor=K_ANCHOR):
     for name,t in order:
         if dt_solar>=t: last=name
         else: break
-    m_branch=JIE_TO_MONTH_JI[last]; m_bidx=MONTH_JI.index(m_branch)
+    m_branch=JIE_TO_MONTH_JI[last]; m_bidx=MONTH_JI_IDX[m_branch]
     m_gidx=(month_start_gan_idx(y_gidx)+m_bidx)%10
     month_pillar=CHEONGAN[m_gidx]+m_branch
     day_pillar,d_cidx,d_jidx=day_ganji_solar(dt_solar,k_anchor)
     h_j_idx=hour_branch_idx_2300(dt_solar)
-    zi_start=sidu_zi_start_gan(CHEONGAN[d_cidx])
-    h_c_idx=(CHEONGAN.index(zi_start)+h_j_idx)%10
+    h_c_idx=(SIDU_START_BY_DAY_GAN_IDX[d_cidx]+h_j_idx)%10
     hour_pillar=CHEONGAN[h_c_idx]+JIJI[h_j_idx]
     return {'year':year_pillar,'month':month_pillar,'day':day_pillar,'hour':hour_pillar,'y_gidx':y_gidx,'m_gidx':m_gidx,'m_bidx':m_bidx,'d_cidx':d_cidx}
 
 def next_prev_jie(dt_solar, jie_solar_dict):
-    items=[(n,t) for n,t in jie_solar_dict.items()]; items.sort(key=lambda x:x[1])
-    prev_t=items[0][1]
-    for _,t in items:
-        if t>dt_solar: return prev_t,t
-        prev_t=t
-    return prev_t,prev_t
+    times=sorted(jie_solar_dict.values())
+    i=bisect_right(times,dt_solar)
+    if i==len(times): return times[-1],times[-1]
+    return times[max(i-1,0)],times[i]
 
 def round_half_up(x): return int(math.floor(x+0.5))
 
@@ -375,6 +463,17 @@ def lunar_to_solar(y,m,d,is_leap=False):
     if not HAS_LUNAR: raise RuntimeError('korean-lunar-calendar 미설치')
     c=KoreanLunarCalendar(); c.setLunarDate(y,m,d,is_leap); return date(c.solarYear,c.solarMonth,c.solarDay)
 
+_LUNAR_CAL = KoreanLunarCalendar() if HAS_LUNAR else None
+def solar_to_lunar_str(y,m,d):
+    """양력 → 음력 표시 문자열 (예: '윤4/3') — 공용 인스턴스 재사용"""
+    if _LUNAR_CAL is None: return ''
+    try:
+        _LUNAR_CAL.setSolarDate(y,m,d)
+        lm=_LUNAR_CAL.lunarMonth; ld=_LUNAR_CAL.lunarDay; is_l=_LUNAR_CAL.isIntercalation
+        leap_str='윤' if is_l else ''
+        return f'{leap_str}{lm}/{ld}'
+    except: return ''
+
 @dataclass
 class Inputs:
     day_stem: str
@@ -387,13 +486,17 @@ class Inputs:
     mid_term_dt: datetime
     day_from_jieqi: int
 
+# 월지 그룹: 0=자오묘유(왕지), 1=인신사해(생지), 2=진술축미(고지)
+BRANCH_GROUP = {b:(0 if b in {'자','오','묘','유'} else 1 if b in {'인','신','사','해'} else 2) for b in JIJI}
+
 def decide_geok(inp):
     ds=inp.day_stem; mb=inp.month_branch; ms=inp.month_stem
     stems=list(inp.stems_visible); branches=list(inp.branches_visible)
     ds_e=STEM_ELEM[ds]; ds_p=STEM_YY[ds]
     mb_main=BRANCH_MAIN[mb]; mb_e,mb_p=STEM_ELEM[mb_main],STEM_YY[mb_main]
-    visible_set=set(stems); hidden_set=all_hidden_stems(branches); pool=visible_set|hidden_set
-    if mb in {'자','오','묘','유','인','신','사','해'} and ds_e==mb_e:
+    visible_mask=stem_mask(stems)
+    grp=BRANCH_GROUP[mb]
+    if grp!=2 and ds_e==mb_e:
         off_e=ELEM_OVER_ME[ds_e]
         jung_gwan=stem_with_polarity(off_e,'음' if ds_p=='양' else '양')
         pyeon_gwan=stem_with_polarity(off_e,ds_p)
@@ -401,24 +504,23 @@ def decide_geok(inp):
         any_jung_br=any(ten_god_for_branch(ds,b)=='정관' for b in branches)
         any_pyeon_br=any(ten_god_for_branch(ds,b)=='편관' for b in branches)
         if same_polarity:
-            if (jung_gwan in visible_set) or any_jung_br:
-                why=('정관 '+jung_gwan+' 천간 투간' if jung_gwan in visible_set else '지지 정관 존재')
+            if (visible_mask&STEM_BIT[jung_gwan]) or any_jung_br:
+                why=('정관 '+jung_gwan+' 천간 투간' if visible_mask&STEM_BIT[jung_gwan] else '지지 정관 존재')
                 return '건록격',f'[특수] 월비+{why}->건록격'
             else: return '월비격','[특수] 월비, 정관 없음->월비격'
         else:
-            if (pyeon_gwan in visible_set) or any_pyeon_br:
-                why=('편관 '+pyeon_gwan+' 천간 투간' if pyeon_gwan in visible_set else '지지 편관 존재')
+            if (visible_mask&STEM_BIT[pyeon_gwan]) or any_pyeon_br:
+                why=('편관 '+pyeon_gwan+' 천간 투간' if visible_mask&STEM_BIT[pyeon_gwan] else '지지 편관 존재')
                 return '양인격',f'[특수] 월겁+{why}->양인격'
             else: return '월겁격','[특수] 월겁, 편관 없음->월겁격'
-    grp='자오묘유' if mb in {'자','오','묘','유'} else ('인신사해' if mb in {'인','신','사','해'} else '진술축미')
-    if grp=='자오묘유':
+    if grp==0:  # 자오묘유
         month_elem=STEM_ELEM[mb_main]
         same_elem_vis=[s for s in stems if STEM_ELEM.get(s)==month_elem]
         if same_elem_vis:
             pick=next((s for s in same_elem_vis if STEM_YY[s]!=ds_p),same_elem_vis[0])
             six=ten_god_for_stem(ds,pick); return f'{six}격',f'[자오묘유] {pick} 투간->{six}격'
         six=ten_god_for_stem(ds,mb_main); return f'{six}격',f'[자오묘유] 투간없음->체(본기 {mb_main}){six}격'
-    if grp=='인신사해':
+    if grp==1:  # 인신사해
         rokji=mb_main; month_elem=STEM_ELEM[rokji]
         base_stems=set(stems_of_element(month_elem))
         base_vis=[s for s in inp.stems_visible if s in base_stems]
@@ -444,7 +546,7 @@ def decide_geok(inp):
                     return f'중기격({six})',f'[인신사해] 삼합+중기사령+{pick}투간->중기격'
         if ms: six=ten_god_for_stem(ds,ms); return f'{six}격',f'[인신사해] 록지투간없음->월간{ms}기준{six}격'
         six=ten_god_for_stem(ds,rokji); return f'{six}격',f'[인신사해] 폴백->본기({rokji}){six}격'
-    if grp=='진술축미':
+    if grp==2:  # 진술축미
         h=BRANCH_HIDDEN.get(mb,[]); mb_main_l=BRANCH_MAIN[mb]; is_front12=(inp.day_from_jieqi<=11)
         tri_elem=MONTH_SAMHAP.get(mb,'')
         if tri_elem:
@@ -452,7 +554,7 @@ def decide_geok(inp):
             if partners:
                 if tri_elem==STEM_ELEM[ds]:
                     six=ten_god_for_stem(ds,mb_main_l); return f'{six}격',f'[진술축미] 반합{mb}+동일오행->체(본기){six}격'
-                tri_stems=stems_of_element(tri_elem); tri_vis=[s for s in tri_stems if s in visible_set]
+                tri_stems=stems_of_element(tri_elem); tri_vis=[s for s in tri_stems if visible_mask&STEM_BIT[s]]
                 mid_qi=h[1] if len(h)>=2 else (h[-1] if h else mb_main_l); mid_is_tri=(STEM_ELEM.get(mid_qi)==tri_elem)
                 pick=tri_vis[0] if tri_vis else (mid_qi if mid_is_tri else stem_with_polarity(tri_elem,'음' if STEM_YY[ds]=='양' else '양'))
                 six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 반합+{pick}기준{six}격'
@@ -463,14 +565,35 @@ def decide_geok(inp):
             pick=opp[0] if opp else (same_vis[0] if same_vis else yeogi)
             six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 절입후12일이내->여기사령({pick}){six}격'
         else:
-            earth_vis=[s for s in ('무','기') if s in visible_set]
+            earth_vis=[s for s in ('무','기') if visible_mask&STEM_BIT[s]]
             opp=[s for s in earth_vis if STEM_YY[s]!=ds_p]
             pick=opp[0] if opp else (earth_vis[0] if earth_vis else mb_main_l)
             six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 절입13일이후->주왕토({pick}){six}격'
     six=ten_god_for_stem(ds,BRANCH_MAIN[mb]); return f'{six}격',f'[폴백]->체(본기{BRANCH_MAIN[mb]}){six}격'
 
-def calc_wolun_accurate(year):
-    jie12_prev=compute_jie_times_calc(year-1); jie12_this=compute_jie_times_calc(year); jie12_next=compute_jie_times_calc(year+1)
+def times_by_name(tables):
+    """연도순 절기표들 → {절기명: 시각순 목록}"""
+    out={}
+    for tbl in tables:
+        for n,t in tbl.items(): out.setdefault(n,[]).append(t)
+    for ts in out.values(): ts.sort()
+    return out
+
+def first_time_after(times, t):
+    """정렬된 times 중 t 보다 늦은 첫 시각 (없으면 None)"""
+    i=bisect_right(times,t)
+    return times[i] if i<len(times) else None
+
+def calc_wolun_accurate(year, apply_solar=None, longitude=None):
+    """월운 12개월 — apply_solar/longitude 미지정 시 session_state 값으로 캐시 키를 완성"""
+    if apply_solar is None: apply_solar=st.session_state.get('apply_solar', True)
+    if longitude is None: longitude=st.session_state.get('longitude', DEFAULT_LONGITUDE)
+    return _cached_wolun(year, apply_solar, longitude)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_wolun(year, apply_solar, longitude):
+    jie12_by_year={y:compute_jie_times_calc(y) for y in (year-1,year,year+1)}
+    jie12_prev,jie12_this,jie12_next=jie12_by_year[year-1],jie12_by_year[year],jie12_by_year[year+1]
     jie24_prev=compute_jie24_times_calc(year-1); jie24_this=compute_jie24_times_calc(year); jie24_next=compute_jie24_times_calc(year+1)
     collected=[]
     for src_jie in [jie12_prev,jie12_this,jie12_next]:
@@ -479,31 +602,31 @@ def calc_wolun_accurate(year):
                 t = src_jie[jname]
                 if t.year==year: collected.append((t,jname))
     collected.sort(key=lambda x:x[0])
+    jie12_times=times_by_name((jie12_prev,jie12_this,jie12_next))
+    jie24_times=times_by_name((jie24_prev,jie24_this,jie24_next))
     items=[]
     for t,jname in collected:
-        t_calc = t + timedelta(seconds=1); fp=four_pillars_from_solar(t_calc)
+        t_calc = t + timedelta(seconds=1); fp=four_pillars_from_solar(t_calc,jie12_wall=jie12_by_year.get(t_calc.year),apply_solar=apply_solar,longitude=longitude)
         m_gan=fp['month'][0]; m_ji=fp['month'][1]
-        t2_name=MONTH_TO_2TERMS[m_ji][1]; t2=None
-        for src in [jie24_this,jie24_prev,jie24_next]:
-            if t2_name in src:
-                cand = src[t2_name]
-                if cand>t: t2=cand; break
-        jie_idx=JIE_ORDER.index(jname); next_jname=JIE_ORDER[(jie_idx+1)%12]; t_end=None
-        for src in [jie12_this,jie12_next,jie12_prev]:
-            if next_jname in src:
-                nt = src[next_jname]
-                if nt>t: t_end=nt; break
+        t2=first_time_after(jie24_times.get(MID_TERM_BY_MONTH_IDX[fp['m_bidx']],()),t)
+        jie_idx=JIE_ORDER_IDX[jname]; next_jname=JIE_ORDER[(jie_idx+1)%12]
+        t_end=first_time_after(jie12_times.get(next_jname,()),t)
         items.append({'month':t.month,'gan':m_gan,'ji':m_ji,'t1':t,'t2':t2,'t_end':t_end})
     return items
 
+def noon_ordinal_on_or_after(dt):
+    """dt 이후(포함) 첫 정오(12:00)가 속한 날짜의 ordinal"""
+    return dt.toordinal()+(1 if dt.time()>time(12) else 0)
+
 def calc_ilun_strip(start_dt, end_dt, day_stem, k_anchor=K_ANCHOR):
-    items=[]; cur=start_dt.replace(hour=12,minute=0,second=0,microsecond=0)
-    if cur<start_dt: cur=cur+timedelta(days=1)
-    while cur<end_dt:
-        dj,dc,djidx=day_ganji_solar(cur,k_anchor); g,j=dj[0],dj[1]
-        items.append({'date':cur.date(),'gan':g,'ji':j,'six':f'{six_for_stem(day_stem,g)}/{six_for_branch(day_stem,j)}'})
-        cur=cur+timedelta(days=1)
-    return items
+    if start_dt.tzinfo is not None and end_dt.tzinfo is not None: end_dt=end_dt.astimezone(start_dt.tzinfo)
+    start_ord=noon_ordinal_on_or_after(start_dt); n=max(0,noon_ordinal_on_or_after(end_dt)-start_ord)
+    # 날짜가 하루 늘면 JDN도 1 증가 → 전 구간 JDN을 arange 한 번으로 계산
+    jdns=start_ord+JDN_MINUS_ORDINAL+np.arange(n,dtype=np.int64)
+    idx60=(jdns+k_anchor)%60
+    tg_stem=TEN_GOD_BY_IDX[CHEONGAN_IDX[day_stem]]; tg_branch=TEN_GOD_BY_BRANCH[CHEONGAN_IDX[day_stem]]
+    return [{'date':date.fromordinal(start_ord+i),'gan':CHEONGAN[c],'ji':JIJI[j],'six':f'{tg_stem[c]}/{tg_branch[j]}'}
+            for i,(c,j) in enumerate(zip((idx60%10).tolist(),(idx60%12).tolist()))]
 
 # ── 사령(司令) 데이터 ──
 SARYEONG = {
@@ -533,6 +656,10 @@ DANGRYEONG = [
     {"months":["해","자"],"period":"입동~동지","heaven_mission":"임수","description":"포용과 흐름 속에서 세상을 연결하고 순환시키는 사명을 받았습니다."},
 ]
 
+DANGRYEONG_BY_BRANCH = {b: [] for b in JIJI}
+for _it in DANGRYEONG:
+    for _b in _it['months']: DANGRYEONG_BY_BRANCH[_b].append(_it)
+
 def get_saryeong_gan(month_branch, day_from_jieqi):
     sr = SARYEONG.get(month_branch)
     if not sr: return None, None
@@ -543,38 +670,33 @@ def get_saryeong_gan(month_branch, day_from_jieqi):
 
 def get_dangryeong(month_branch, dt_solar=None, jie24_solar=None):
     boundary_jie = {'오':'하지','묘':'춘분','유':'추분','자':'동지','해':'입동'}
+    matched = DANGRYEONG_BY_BRANCH.get(month_branch, [])
     if month_branch in boundary_jie and dt_solar and jie24_solar:
         jie_name = boundary_jie[month_branch]
         jie_dt = jie24_solar.get(jie_name)
-        if jie_dt:
-            matched = [item for item in DANGRYEONG if month_branch in item['months']]
-            if len(matched) >= 2:
-                return matched[1] if dt_solar >= jie_dt else matched[0]
-            elif matched:
-                return matched[0]
-    for item in DANGRYEONG:
-        if month_branch in item['months']:
-            return item
-    return None
+        if jie_dt and len(matched) >= 2:
+            return matched[1] if dt_solar >= jie_dt else matched[0]
+    return matched[0] if matched else None
 
-def get_nearby_jeolip(dt_ref):
-    """dt_ref 근처의 절기를 벽시계(당시 법정시)로 반환"""
-    year = dt_ref.year
+@lru_cache(maxsize=64)
+def _jeolip_window(year):
+    """year-1 ~ year+1 의 24절기를 시각순으로 정렬한 (names, times) — 연도별 캐시"""
     all_jeolip = []
     for y in [year-1, year, year+1]:
         jie24 = compute_jie24_times_calc(y)
         for name in JIE24_ORDER:
             if name in jie24:
-                t = jie24[name]
-                all_jeolip.append((name, t))
+                all_jeolip.append((name, jie24[name]))
     all_jeolip.sort(key=lambda x: x[1])
-    prev_item = None
-    next_item = None
-    for item in all_jeolip:
-        if item[1] <= dt_ref:
-            prev_item = item
-        elif next_item is None and item[1] > dt_ref:
-            next_item = item
+    return tuple(all_jeolip), tuple(t for _, t in all_jeolip)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_nearby_jeolip(dt_ref):
+    """dt_ref 근처의 절기를 벽시계(당시 법정시)로 반환"""
+    all_jeolip, times = _jeolip_window(dt_ref.year)
+    i = bisect_right(times, dt_ref)
+    prev_item = all_jeolip[i-1] if i > 0 else None
+    next_item = all_jeolip[i] if i < len(all_jeolip) else None
     return prev_item, next_item
 
 # ── 격(格) 카드 데이터 ──
@@ -591,8 +713,15 @@ GYEOK_CARDS = [
     {"slug":"pyeongwan","card_title":"관리감독 · 편관격","icon":"🦅","one_liner":"기준을 세워 구분하고 단속하는 '감독형 리더'","story":"당신은 흐릿한 상태를 싫어하고, 분명한 기준을 세우는 사람입니다. 조직의 경쟁력은 관리와 감독에서 나온다고 믿고, 역할, 위계, 규율을 선명하게 잡아줘요. 남들이 놓치는 문제를 빠르게 찾아내는 감별력이 강합니다.","strengths":["문제 탐지/감별력","위기 관리","규율 수립","결단력"],"growth_tips":["지적 전에 기대 기준을 먼저 공유","사람을 단속하기보다 행동을 교정하기","강한 메시지 뒤엔 반드시 출구(대안) 제공"],"praise_keywords":["특출나다","안목이 좋다","감별사다","결단력 있다","위기를 잡는다"],"keywords":["편관격","편관","중기격"]},
 ]
 
+GYEOK_BY_KEYWORD = {}
+for _card in GYEOK_CARDS:
+    for _kw in _card["keywords"]: GYEOK_BY_KEYWORD.setdefault(_kw, _card)
+
 def find_geok_card(geok_name):
     geok_clean = geok_name.replace('격','').strip()
+    card = GYEOK_BY_KEYWORD.get(geok_name) or GYEOK_BY_KEYWORD.get(geok_clean)
+    if card: return card
+    # '중기격(편관)' 처럼 키워드를 포함하는 복합 이름은 순서대로 부분일치 검색
     for card in GYEOK_CARDS:
         for kw in card["keywords"]:
             if kw in geok_name or kw in geok_clean:
@@ -653,8 +782,8 @@ div[data-testid='column']{padding:0 2px!important;}
 </style>
 """
 
-def hanja_gan(g): return HANJA_GAN[CHEONGAN.index(g)]
-def hanja_ji(j): return HANJA_JI[JIJI.index(j)]
+def hanja_gan(g): return HANJA_GAN[CHEONGAN_IDX[g]]
+def hanja_ji(j): return HANJA_JI[JIJI_IDX[j]]
 
 def gan_card_html(g, size=52, fsize=26):
     bg=GAN_BG.get(g,"#888"); fg=gan_fg(g); hj=hanja_gan(g)
@@ -781,8 +910,8 @@ def page_input():
 
             # ★ 진태양시 절기 (계산용)
             if apply_solar:
-                jie12_solar = {k: to_solar_time(v, longitude) for k, v in jie12_wall.items()}
-                jie24_solar = {k: to_solar_time(v, longitude) for k, v in jie24_wall.items()}
+                jie12_solar = dict(zip(jie12_wall, to_solar_time_batch(list(jie12_wall.values()), longitude)))
+                jie24_solar = dict(zip(jie24_wall, to_solar_time_batch(list(jie24_wall.values()), longitude)))
             else:
                 jie12_solar = dict(jie12_wall)
                 jie24_solar = dict(jie24_wall)
@@ -797,7 +926,7 @@ def page_input():
                 sy=seun_start+i; off=(sy-4)%60
                 seun.append((sy,CHEONGAN[off%10],JIJI[off%12]))
 
-            pair=MONTH_TO_2TERMS[fp['month'][1]]
+            pair=(FIRST_TERM_BY_MONTH_IDX[fp['m_bidx']],MID_TERM_BY_MONTH_IDX[fp['m_bidx']])
             def nearest_t(name):
                 cands=[(abs((t-dt_solar).total_seconds()),t) for n,t in jie24_solar.items() if n==name]
                 if not cands: return dt_solar
@@ -848,7 +977,7 @@ def page_input():
                 't1':t1,'t2':t2,'day_from_jieqi':day_from_jieqi,
                 'ilgan':ilgan,'start_age':start_age,'forward':forward,
                 'jie24_solar':jie24_solar,
-                'jie24_wall':jie24_wall,
+                'jie24_wall':dict(jie24_wall),
                 'longitude': longitude,
                 'apply_solar': apply_solar,
                 'tz_label': tz_lbl,
@@ -1119,6 +1248,43 @@ def page_wolun():
     )
     st.markdown(bottom_html, unsafe_allow_html=True)
 
+@st.cache_data(show_spinner=False, max_entries=128)
+def month_jie_map_for(year, month):
+    """이 달의 절기 목록 (날짜 -> 절기명,시각) — 벽시계(당시 법정시) 기준"""
+    month_jie_map={}
+    for jname,jt in compute_jie24_times_calc(year).items():
+        if jt.year==year and jt.month==month:
+            month_jie_map[jt.day]=(jname,jt)
+    return month_jie_map
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def month_lunar_strs(year, month):
+    """이 달 각 날짜의 음력 표시 문자열 목록 (인덱스 = 일-1)"""
+    return [solar_to_lunar_str(year,month,d) for d in range(1,cal_mod.monthrange(year,month)[1]+1)]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def year_ganji_table(year, longitude, apply_solar):
+    """year 각 날짜(정오 기준)의 일주 60갑자 인덱스 표 — table[월, 일]"""
+    table=np.zeros((13,32),dtype=np.int32)
+    y0=date(year,1,1).toordinal()
+    ords=np.arange(y0,date(year+1,1,1).toordinal())
+    # 정오 벽시계 → 진태양시(분); 23:00 이후면 다음 날, 0:00 이전이면 전날 일주
+    solar_min=720.0+(wall_to_true_solar_offset_minutes(ords,longitude) if apply_solar else 0.0)
+    day_shift=np.floor_divide(solar_min+60.0,1440.0).astype(np.int64)
+    idx60=(ords+JDN_MINUS_ORDINAL+day_shift+K_ANCHOR)%60
+    for m in range(1,13):
+        s=date(year,m,1).toordinal()-y0; n=cal_mod.monthrange(year,m)[1]
+        table[m,1:n+1]=idx60[s:s+n]
+    return table
+
+# 일운 달력 칸의 고정 HTML 조각
+_TD_EMPTY = '<td class="empty"></td>'
+_CELL_JIE_OPEN = '<div style="font-size:8px;color:#b06000;font-weight:bold;">'
+_CELL_DN_OPEN = '<div class="dn">'
+_CELL_LUNAR_OPEN = '<div style="font-size:8px;color:#5a5a8a;">'
+_CELL_SIX_OPEN = '<div style="font-size:9px;color:#888;">'
+_CELL_GANJI_OPEN = '<div style="font-size:14px;font-weight:bold;">'
+
 def page_ilun():
     data=st.session_state.saju_data
     if not data or 'fp' not in data: st.session_state.page='input'; st.rerun(); return
@@ -1137,21 +1303,13 @@ def page_ilun():
     hj_wg=hanja_gan(wg); hj_wj=hanja_ji(wj)
     hj_sg=hanja_gan(sg); hj_sj=hanja_ji(sj)
     display_age = sel_su + 1
-    st.markdown(f'<div class="sel-info">{sy}년({display_age}세) {wm}월 ({hj_wg}{hj_wj}) 일운</div>', unsafe_allow_html=True)
+    sel_html=f'<div class="sel-info">{sy}년({display_age}세) {wm}월 ({hj_wg}{hj_wj}) 일운</div>'
 
-    _,days_in_month=cal_mod.monthrange(sy,wm)
-    first_weekday,_=cal_mod.monthrange(sy,wm)
+    first_weekday,days_in_month=cal_mod.monthrange(sy,wm)
     first_wd=(first_weekday+1)%7
 
     # ★ 절기: 벽시계(당시 법정시)로 표시 — to_solar_time 적용하지 않음
-    jie24_this = compute_jie24_times_calc(sy)
-    jie24_wall_ilun = jie24_this  # 이미 벽시계 시간
-
-    # 이 달의 절기 목록 (날짜 -> 절기명,시각)
-    month_jie_map={}
-    for jname,jt in jie24_wall_ilun.items():
-        if jt.year==sy and jt.month==wm:
-            month_jie_map[jt.day]=(jname,jt)
+    month_jie_map=month_jie_map_for(sy, wm)
 
     # ★ 절기 표시에 표준시 라벨 추가
     sample_date = date(sy, wm, 15)
@@ -1161,58 +1319,40 @@ def page_ilun():
     month_terms_list=sorted(month_jie_map.items())
     month_terms_str=' / '.join([f"{v[0]} ({v[1].strftime('%d일 %H:%M')})" for k,v in month_terms_list])
 
-    # 음력 변환
-    def solar_to_lunar_str(y,m,d):
-        if not HAS_LUNAR: return ''
-        try:
-            c=KoreanLunarCalendar()
-            c.setSolarDate(y,m,d)
-            lm=c.lunarMonth; ld=c.lunarDay; is_l=c.isIntercalation
-            leap_str='윤' if is_l else ''
-            return f'{leap_str}{lm}/{ld}'
-        except: return ''
-    day_items=[]
-    for d in range(1, days_in_month+1):
-        dt_local=datetime(sy,wm,d,12,0,tzinfo=LOCAL_TZ)
-
-        if apply_solar:
-            dt_solar = to_solar_time(dt_local, longitude)
-        else:
-            dt_solar = dt_local
-        dj,dc,djidx=day_ganji_solar(dt_solar)
-        g,j=dj[0],dj[1]
-        sg_six=six_for_stem(ilgan,g); sj_six=six_for_branch(ilgan,j)
-        lunar_str=solar_to_lunar_str(sy,wm,d)
-        jie_info=month_jie_map.get(d,None)
-        jie_str=jie_info[0] if jie_info else ''
-        day_items.append({'day':d,'gan':g,'ji':j,'sg_six':sg_six,'sj_six':sj_six,'lunar':lunar_str,'jie':jie_str})
-
-    html='<div class="cal-wrap">'
-    html+=f'<div class="cal-header">{sy}년({hj_sg}{hj_sj}) {wm}월({hj_wg}{hj_wj})</div>'
+    day60=year_ganji_table(sy, longitude, apply_solar)[wm,1:days_in_month+1]
+    g_arr,j_arr,sg_arr,sj_arr=_day_kernel(CHEONGAN_IDX[ilgan], day60)
+    # 일별 열(column) — 인덱스 d 는 (일-1)
+    gan_idx=g_arr.tolist(); ji_idx=j_arr.tolist()
+    sg_six=[SIX_LABELS[i] for i in sg_arr.tolist()]; sj_six=[SIX_LABELS[i] for i in sj_arr.tolist()]
+    lunar_strs=month_lunar_strs(sy, wm)
+    jie_strs=[month_jie_map[d][0] if d in month_jie_map else '' for d in range(1,days_in_month+1)]
+
+    parts=['<div class="cal-wrap">']
+    parts.append(f'<div class="cal-header">{sy}년({hj_sg}{hj_sj}) {wm}월({hj_wg}{hj_wj})</div>')
     if month_terms_str:
-        html+=f'<div style="background:#f5eed8;padding:4px 8px;font-size:11px;color:#7a5a1a;text-align:center;border-bottom:1px solid #c8b87a;">🌿 절기({ilun_tz_lbl}): {month_terms_str}</div>'
-    html+='<table class="cal-table"><thead><tr>'
-    for dn in ['일','월','화','수','목','금','토']: html+=f'<th>{dn}</th>'
-    html+='</tr></thead><tbody><tr>'
-    for _ in range(first_wd): html+='<td class="empty"></td>'
+        parts.append(f'<div style="background:#f5eed8;padding:4px 8px;font-size:11px;color:#7a5a1a;text-align:center;border-bottom:1px solid #c8b87a;">🌿 절기({ilun_tz_lbl}): {month_terms_str}</div>')
+    parts.append('<table class="cal-table"><thead><tr>')
+    parts.extend(f'<th>{dn}</th>' for dn in ['일','월','화','수','목','금','토'])
+    parts.append('</tr></thead><tbody><tr>')
+    parts.extend([_TD_EMPTY]*first_wd)
     col_pos=first_wd
-    for item in day_items:
-        if col_pos==7: html+='</tr><tr>'; col_pos=0
-        d_num=item["day"]; dow=(first_wd+d_num-1)%7
+    for d in range(days_in_month):
+        if col_pos==7: parts.append('</tr><tr>'); col_pos=0
+        d_num=d+1; dow=(first_wd+d)%7
         is_today=(sy==now.year and wm==now.month and d_num==now.day)
         cls='today-cell' if is_today else ''
         if dow==0: cls+=' sun'
         elif dow==6: cls+=' sat'
-        hj_dg=hanja_gan(item["gan"]); hj_dj=hanja_ji(item["ji"])
-        sg6=item["sg_six"]; sj6=item["sj_six"]
-        lunar6=item.get("lunar",""); jie6=item.get("jie","")
-        jie_html=f'<div style="font-size:8px;color:#b06000;font-weight:bold;">{jie6}</div>' if jie6 else ''
-        lunar_html=f'<div style="font-size:8px;color:#5a5a8a;">{lunar6}</div>' if lunar6 else ''
-        html+=f'<td class="{cls.strip()}">{jie_html}<div class="dn">{d_num}</div>{lunar_html}<div style="font-size:9px;color:#888;">{sg6}</div><div style="font-size:14px;font-weight:bold;">{hj_dg}</div><div style="font-size:14px;font-weight:bold;">{hj_dj}</div><div style="font-size:9px;color:#888;">{sj6}</div></td>'
+        lunar6=lunar_strs[d]; jie6=jie_strs[d]
+        parts.extend(('<td class="',cls.strip(),'">'))
+        if jie6: parts.extend((_CELL_JIE_OPEN,jie6,'</div>'))
+        parts.extend((_CELL_DN_OPEN,str(d_num),'</div>'))
+        if lunar6: parts.extend((_CELL_LUNAR_OPEN,lunar6,'</div>'))
+        parts.extend((_CELL_SIX_OPEN,sg_six[d],'</div>',_CELL_GANJI_OPEN,HANJA_GAN[gan_idx[d]],'</div>',_CELL_GANJI_OPEN,HANJA_JI[ji_idx[d]],'</div>',_CELL_SIX_OPEN,sj_six[d],'</div></td>'))
         col_pos+=1
-    while col_pos%7!=0 and col_pos>0: html+='<td class="empty"></td>'; col_pos+=1
-    html+='</tr></tbody></table></div>'
-    st.markdown(html,unsafe_allow_html=True)
+    while col_pos%7!=0 and col_pos>0: parts.append(_TD_EMPTY); col_pos+=1
+    parts.append('</tr></tbody></table></div>')
+    calendar_html=''.join(parts)
 
     gpt_url='https://chatgpt.com/g/g-68d90b2d8f448191b87fb7511fa8f80a-rua-myeongrisajusangdamsa'
     bottom_html = (
@@ -1221,7 +1361,8 @@ def page_ilun():
         f'<a href="{gpt_url}" target="_blank" class="bottom-btn-ai">🤖 AI 챗봇 무료상담</a>'
         '</div>'
     )
-    st.markdown(bottom_html, unsafe_allow_html=True)
+    # 선택 정보·달력·하단 버튼을 한 번에 그린다 (← 월운으로 버튼은 위젯이라 별도)
+    st.markdown('\n'.join([sel_html, calendar_html, bottom_html]), unsafe_allow_html=True)
 
 if __name__=='__main__':
     main()
@@ -39,10 +39,23 @@ korea_tz_history.py
 ═══════════════════════════════════════════════════════════════
 """
 from __future__ import annotations
+from bisect import bisect_right
 from datetime import datetime, date, time, timedelta, timezone
 from dataclasses import dataclass
+from functools import lru_cache
 import math
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """numba 미설치 시 함수를 그대로 돌려주는 대체 데코레이터."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
 # ===================================================================
 # 1. 표준시 기간 정의 (standard_meridian in degrees East)
 # ===================================================================
@@ -138,20 +151,43 @@ _DST_RECORDS: list[DSTRecord] = [
 # ===================================================================
 # 3. 조회 함수
 # ===================================================================
+# bisect 용 시작일/종료일 ordinal (두 목록 모두 시작일 순, 구간 겹침 없음)
+_PERIOD_STARTS = [p.start.toordinal() for p in _PERIODS]
+_PERIOD_ENDS = [p.end.toordinal() for p in _PERIODS]
+_DST_STARTS = [r.start.toordinal() for r in _DST_RECORDS]
+_DST_ENDS = [r.end.toordinal() for r in _DST_RECORDS]
+
+# 표준시/DST 경계가 들어 있는 (연, 월). 그 밖의 달은 한 달 내내 오프셋이 같다.
+_BOUNDARY_MONTHS = frozenset(
+    (x.year, x.month)
+    for rec in (*_PERIODS, *_DST_RECORDS)
+    for x in (rec.start, rec.end)
+)
+
+
+def _tz_rep_date(d: date) -> date:
+    """캐시 키: 경계 없는 달은 그 달 1일, 경계 달은 날짜 그대로."""
+    if (d.year, d.month) in _BOUNDARY_MONTHS:
+        return d
+    return d.replace(day=1)
+
+
 def get_standard_period(d: date) -> StandardTimePeriod:
     """주어진 날짜에 적용되는 표준시 기간을 반환."""
-    for p in _PERIODS:
-        if p.start <= d <= p.end:
-            return p
+    o = d.toordinal()
+    i = bisect_right(_PERIOD_STARTS, o) - 1
+    if i >= 0 and o <= _PERIOD_ENDS[i]:
+        return _PERIODS[i]
     # fallback: 현행
     return _PERIODS[-1]
 
 
 def get_dst_record(d: date) -> DSTRecord | None:
     """주어진 날짜에 적용 중인 DST 기록을 반환 (없으면 None)."""
-    for r in _DST_RECORDS:
-        if r.start <= d <= r.end:
-            return r
+    o = d.toordinal()
+    i = bisect_right(_DST_STARTS, o) - 1
+    if i >= 0 and o <= _DST_ENDS[i]:
+        return _DST_RECORDS[i]
     return None
 
 
@@ -163,8 +199,13 @@ def is_dst_active(d: date) -> bool:
 def get_wall_clock_utc_offset(d: date) -> int:
     """
     해당 날짜의 벽시계 UTC 오프셋(분).
-    표준시 오프셋 + DST 보정.
+    표준시 오프셋 + DST 보정. (경계 없는 달은 월 단위 캐시)
     """
+    return _wall_clock_utc_offset_cached(_tz_rep_date(d))
+
+
+@lru_cache(maxsize=4096)
+def _wall_clock_utc_offset_cached(d: date) -> int:
     p = get_standard_period(d)
     offset = p.utc_offset_min
     dst = get_dst_record(d)
@@ -181,17 +222,38 @@ def get_standard_meridian(d: date) -> float:
 # ===================================================================
 # 4. 균시차(Equation of Time) — 진태양시 보정
 # ===================================================================
+@lru_cache(maxsize=None)
+def _year_start_ord(year: int) -> int:
+    return date(year, 1, 1).toordinal()
+
+
+def _day_of_year(d: date) -> int:
+    """연중 일수(1~366). timetuple() 의 struct_time 생성 없이 ordinal 차로 계산."""
+    return d.toordinal() - _year_start_ord(d.year) + 1
+
+
 def equation_of_time_minutes(dt_utc: datetime) -> float:
     """
     균시차(EoT)를 분 단위로 반환.
     평균태양시 → 진태양시 변환에 사용.
     양수 → 진태양이 평균태양보다 앞섬.
     """
-    doy = dt_utc.timetuple().tm_yday
+    return _eot_njit(_day_of_year(dt_utc))
+
+
+@njit(cache=True, fastmath=True)
+def _eot_njit(doy):
+    """연중 일수(1~366) → 균시차(분). equation_of_time_minutes 의 스칼라 본체."""
     B = math.radians((360.0 / 365.0) * (doy - 81))
     return 9.87 * math.sin(2 * B) - 7.53 * math.cos(B) - 1.5 * math.sin(B)
 
 
+def equation_of_time_minutes_vec(doy: np.ndarray) -> np.ndarray:
+    """equation_of_time_minutes 의 벡터판 — 연중 일수(1~366) 배열을 받는다."""
+    B = np.radians((360.0 / 365.0) * (np.asarray(doy) - 81))
+    return 9.87 * np.sin(2 * B) - 7.53 * np.cos(B) - 1.5 * np.sin(B)
+
+
 # ===================================================================
 # 5. 핵심 변환 함수: 벽시계 → 진태양시
 # ===================================================================
@@ -226,17 +288,8 @@ def wall_to_true_solar_time(
     2) 지방평균시(LMT) = UTC + (경도 / 15) × 60분
     3) 진태양시(TST) = LMT + 균시차(EoT)
     """
-    d = dt_wall.date() if hasattr(dt_wall, 'date') else dt_wall
-
     # --- 1) 벽시계 → UTC ---
-    if dt_wall.tzinfo is not None:
-        # timezone-aware: 직접 UTC 변환
-        dt_utc = dt_wall.astimezone(timezone.utc)
-    else:
-        # timezone-naive → 해당 날짜의 한국 벽시계로 간주
-        wall_offset_min = get_wall_clock_utc_offset(d)
-        tz_wall = timezone(timedelta(minutes=wall_offset_min))
-        dt_utc = dt_wall.replace(tzinfo=tz_wall).astimezone(timezone.utc)
+    dt_utc = _wall_to_utc(dt_wall)
 
     # --- 2) UTC → 지방평균시(LMT) ---
     lmt_offset_min = longitude * 4.0   # 경도 1도 = 4분
@@ -253,6 +306,59 @@ def wall_to_true_solar_time(
     return dt_tst.replace(tzinfo=None, microsecond=0)
 
 
+def _wall_to_utc(dt_wall: datetime) -> datetime:
+    """
+    벽시계 시각 → UTC. timezone-naive이면 해당 날짜의 한국 벽시계로 간주.
+    aware 입력은 aware UTC, naive 입력은 naive UTC 를 돌려준다.
+    """
+    if dt_wall.tzinfo is not None:
+        # timezone-aware: 직접 UTC 변환
+        return dt_wall.astimezone(timezone.utc)
+    # timezone-naive → 한국 벽시계 오프셋만큼 빼서 naive UTC
+    wall_offset_min = get_wall_clock_utc_offset(dt_wall.date())
+    return dt_wall - timedelta(minutes=wall_offset_min)
+
+
+def wall_to_true_solar_time_batch(
+    dts_wall: list[datetime],
+    longitude: float = 127.0,
+    apply_eot: bool = True,
+) -> list[datetime]:
+    """
+    wall_to_true_solar_time 의 일괄 처리판.
+    균시차를 NumPy로 한 번에 계산하며, 결과는 개별 호출과 같다.
+    """
+    dts_utc = [_wall_to_utc(dt) for dt in dts_wall]
+    lmt_delta = timedelta(minutes=longitude * 4.0)
+    if apply_eot and dts_utc:
+        doy = np.array([_day_of_year(dt) for dt in dts_utc])
+        eots = equation_of_time_minutes_vec(doy).tolist()
+    else:
+        eots = [0.0] * len(dts_utc)
+    return [
+        (dt_utc + lmt_delta + timedelta(minutes=eot)).replace(tzinfo=None, microsecond=0)
+        for dt_utc, eot in zip(dts_utc, eots)
+    ]
+
+
+def wall_to_true_solar_offset_minutes(
+    dates_ord: np.ndarray,
+    longitude: float = 127.0,
+    apply_eot: bool = True,
+) -> np.ndarray:
+    """
+    날짜(ordinal) 배열 각각의 '진태양시 − 한국 벽시계' 보정량(분) 배열.
+    균시차는 해당 날짜의 연중 일수로 계산 (정오 부근 시각 기준).
+    """
+    days = [date.fromordinal(int(o)) for o in dates_ord]
+    wall_offsets = np.array([get_wall_clock_utc_offset(d) for d in days], dtype=float)
+    offsets = longitude * 4.0 - wall_offsets
+    if apply_eot:
+        doy = np.array([_day_of_year(d) for d in days])
+        offsets = offsets + equation_of_time_minutes_vec(doy)
+    return offsets
+
+
 def wall_to_true_solar_time_historical(
     year: int, month: int, day: int,
     hour: int, minute: int,
@@ -264,7 +370,20 @@ def wall_to_true_solar_time_historical(
     (timezone 없는 '벽시계' 입력 전용)
 
     해당 날짜의 한국 표준시+DST 상태를 자동 판별.
+    결과는 인자별로 캐시 (경도는 소수 4자리로 반올림 — 약 0.01초 이내 차이).
     """
+    return _wall_to_true_solar_time_historical_cached(
+        year, month, day, hour, minute, round(longitude, 4), apply_eot
+    )
+
+
+@lru_cache(maxsize=4096)
+def _wall_to_true_solar_time_historical_cached(
+    year: int, month: int, day: int,
+    hour: int, minute: int,
+    longitude: float,
+    apply_eot: bool,
+) -> datetime:
     d = date(year, month, day)
     wall_offset = get_wall_clock_utc_offset(d)
     tz = timezone(timedelta(minutes=wall_offset))
@@ -278,8 +397,15 @@ def wall_to_true_solar_time_historical(
 def describe_timezone_for_date(d: date) -> dict:
     """
     특정 날짜의 표준시/DST 상태를 사전으로 반환.
-    UI 표시용.
+    UI 표시용. (월/날짜별 캐시의 사본을 반환)
     """
+    info = dict(_describe_timezone_cached(_tz_rep_date(d)))
+    info["date"] = d.isoformat()
+    return info
+
+
+@lru_cache(maxsize=4096)
+def _describe_timezone_cached(d: date) -> dict:
     p = get_standard_period(d)
     dst = get_dst_record(d)
     total_offset = p.utc_offset_min + (dst.advance_min if dst else 0)
@@ -312,15 +438,61 @@ def correction_minutes_for_saju(
     양수 → 벽시계가 태양시보다 빠름 (시계가 앞섬)
     음수 → 벽시계가 태양시보다 느림 (시계가 뒤짐)
     """
-    p = get_standard_period(d)
-    dst = get_dst_record(d)
-    dst_min = dst.advance_min if dst else 0
+    if d.year not in _BOUNDARY_YEARS:
+        meridian, dst_min = _YEAR_MID_CORR[d.year - 1].tolist()
+    else:
+        meridian = get_standard_period(d).meridian
+        dst = get_dst_record(d)
+        dst_min = dst.advance_min if dst else 0
 
     # 보정 = (표준자오선 − 출생지경도) × 4 + DST보정
-    correction = (p.meridian - longitude) * 4.0 + dst_min
+    correction = (meridian - longitude) * 4.0 + dst_min
     return correction
 
 
+_PERIOD_STARTS_ARR = np.array(_PERIOD_STARTS)
+_PERIOD_ENDS_ARR = np.array(_PERIOD_ENDS)
+_PERIOD_MERIDIANS = np.array([p.meridian for p in _PERIODS])
+_DST_STARTS_ARR = np.array(_DST_STARTS)
+_DST_ENDS_ARR = np.array(_DST_ENDS)
+_DST_ADVANCES = np.array([r.advance_min for r in _DST_RECORDS])
+
+
+def _meridian_dst_for_ords(o: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ordinal 배열 → (표준자오선 배열, DST 보정분 배열)."""
+    i = np.searchsorted(_PERIOD_STARTS_ARR, o, side="right") - 1
+    in_period = (i >= 0) & (o <= _PERIOD_ENDS_ARR[np.maximum(i, 0)])
+    i = np.where(in_period, i, len(_PERIODS) - 1)  # fallback: 현행
+    j = np.searchsorted(_DST_STARTS_ARR, o, side="right") - 1
+    in_dst = (j >= 0) & (o <= _DST_ENDS_ARR[np.maximum(j, 0)])
+    dst_min = np.where(in_dst, _DST_ADVANCES[np.maximum(j, 0)], 0)
+    return _PERIOD_MERIDIANS[i], dst_min
+
+
+def _year_mid_corr_table() -> np.ndarray:
+    """연도(1~9999)별 (표준자오선, DST 보정분) 표 — 6월 15일 기준."""
+    o = np.array([date(y, 6, 15).toordinal() for y in range(1, 10000)])
+    meridians, dst_min = _meridian_dst_for_ords(o)
+    return np.column_stack((meridians, dst_min)).astype(np.float64)
+
+
+# 경계 달이 없는 해는 한 해 내내 보정값이 같다 → 연도 표 조회
+_BOUNDARY_YEARS = frozenset(y for y, _ in _BOUNDARY_MONTHS)
+_YEAR_MID_CORR = _year_mid_corr_table()
+
+
+def correction_minutes_for_saju_vec(
+    dates_ord: np.ndarray,
+    longitude: float = 127.0,
+) -> np.ndarray:
+    """
+    correction_minutes_for_saju 의 벡터판 — 날짜(ordinal) 배열을 받는다.
+    표준시 기간/DST 기록을 np.searchsorted 한 번씩으로 찾는다.
+    """
+    meridians, dst_min = _meridian_dst_for_ords(np.asarray(dates_ord))
+    return (meridians - longitude) * 4.0 + dst_min
+
+
 # ===================================================================
 # 7. 검증: 첨부 표와 대조
 # ===================================================================
@@ -348,9 +520,11 @@ def _verify_table():
     print("검증: 벽시계 12:00 (서울 127°E) → 진태양시 (EoT 제외)")
     print("=" * 70)
     all_pass = True
-    for d, expected, desc in test_cases:
-        # EoT 제외 계산 (표의 값은 EoT 미반영 근사)
-        corr = correction_minutes_for_saju(d, 127.0)
+    # EoT 제외 계산 (표의 값은 EoT 미반영 근사)
+    corrs = correction_minutes_for_saju_vec(
+        np.array([d.toordinal() for d, _, _ in test_cases]), 127.0
+    ).tolist()
+    for (d, expected, desc), corr in zip(test_cases, corrs):
         solar_min = 12 * 60 - corr
         h, m = divmod(int(solar_min), 60)
         result = f"{h:02d}:{m:02d}"